@@ -1,32 +1,59 @@
 import json
+import os
 import random
+import requests
 import schedule
 import time
 import signal
 import sys
 import datetime
 import logging
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 
 from config import config
-from utils import setup_logger, graceful_shutdown
+from utils import setup_logger, graceful_shutdown, json_loads
 from history import history
 
 # Настройка логирования
 logger = setup_logger(__name__, config.log_level, config.log_file)
 
+# Последняя минута суток и базовое время публикации в минутах (config неизменяем)
+_MAX_MINUTE = 24 * 60 - 1
+_BASE_TOTAL_MINUTES = config.base_hour * 60 + config.base_minute
+
+# Максимальная пауза основного цикла (секунды)
+_MAX_SLEEP_SECONDS = 3600
+
+# Одна HTTP-сессия на процесс: соединение с api.telegram.org переиспользуется
+_session = requests.Session()
+_session.mount('https://', requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=4))
+
+# Разобранные цитаты и mtime файла, из которого они прочитаны
+_quotes_cache: Optional[Tuple[int, List[Dict]]] = None
+
 def load_quotes() -> List[Dict]:
-    """Загружает цитаты из JSON файла"""
+    """Загружает цитаты из JSON файла (перечитывает только при изменении файла)"""
+    global _quotes_cache
     try:
-        with open(config.quotes_file, 'r', encoding='utf-8') as file:
-            quotes = json.load(file)
-        logger.info(f"Загружено {len(quotes)} цитат")
+        mtime = os.stat(config.quotes_file).st_mtime_ns
+        if _quotes_cache is not None and _quotes_cache[0] == mtime:
+            return _quotes_cache[1]
+        
+        with open(config.quotes_file, 'rb') as file:
+            quotes = json_loads(file.read())
+        # Тексты интернируем: ключи истории совпадут с ними по ссылке
+        for quote in quotes:
+            text = quote.get('text')
+            if isinstance(text, str):
+                quote['text'] = sys.intern(text)
+        logger.info("Загружено %d цитат", len(quotes))
+        _quotes_cache = (mtime, quotes)
         return quotes
     except FileNotFoundError:
-        logger.error(f"Файл '{config.quotes_file}' не найден")
+        logger.error("Файл '%s' не найден", config.quotes_file)
         return []
     except json.JSONDecodeError as e:
-        logger.error(f"Ошибка JSON в файле '{config.quotes_file}': {e}")
+        logger.error("Ошибка JSON в файле '%s': %s", config.quotes_file, e)
         return []
 
 # ============= ЕДИНСТВЕННАЯ ФУНКЦИЯ get_unique_quote =============
@@ -41,7 +68,7 @@ def get_unique_quote(quotes: List[Dict]) -> Dict:
         quote = random.choice(available)
         total = len(quotes)
         used = total - len(available)
-        logger.info(f"📊 Использовано {used}/{total} цитат в этом цикле")
+        logger.info("📊 Использовано %d/%d цитат в этом цикле", used, total)
         return quote
     
     # Если нет доступных - СБРАСЫВАЕМ ИСТОРИЮ и начинаем заново
@@ -62,20 +89,21 @@ def format_quote(quote_data: Dict) -> str:
 
 def send_quote():
     """Выбирает цитату и отправляет ее в канал"""
-    import requests
-    
     quotes = load_quotes()
     
     if not quotes:
         logger.warning("Не могу отправить цитату. Список цитат пуст.")
         return
     
+    # Подхватываем правки истории, сделанные вне бота
+    history.reload_if_changed()
+    
     # Получаем цитату (теперь всегда получаем)
     quote_data = get_unique_quote(quotes)
     formatted_quote = format_quote(quote_data)
     quote_text = quote_data.get('text', '')
     
-    logger.info(f"Отправляю цитату: {quote_text[:50]}...")
+    logger.info("Отправляю цитату: %.50s...", quote_text)
     
     url = f'https://api.telegram.org/bot{config.tg_q_bot_token}/sendMessage'
     payload = {
@@ -84,38 +112,37 @@ def send_quote():
     }
     
     try:
-        response = requests.post(url, data=payload, timeout=10)
+        response = _session.post(url, data=payload, timeout=10)
         if response.status_code == 200:
             logger.info("✅ Цитата успешно отправлена!")
             # Отмечаем цитату как опубликованную
             history.mark_published(quote_text)
             # Показываем статистику
             stats = history.get_stats()
-            logger.info(f"📈 Всего уникальных публикаций: {stats['total']}")
+            logger.info("📈 Всего уникальных публикаций: %d", stats['total'])
         else:
-            logger.error(f"❌ Ошибка Telegram API: {response.status_code}")
-            logger.error(f"Детали: {response.text}")
+            logger.error("❌ Ошибка Telegram API: %s", response.status_code)
+            logger.error("Детали: %s", response.text)
     except requests.exceptions.RequestException as e:
-        logger.error(f"❌ Сетевая ошибка: {e}")
+        logger.error("❌ Сетевая ошибка: %s", e)
     except Exception as e:
-        logger.error(f"❌ Неожиданная ошибка: {e}")
+        logger.error("❌ Неожиданная ошибка: %s", e)
 
 def schedule_random_time() -> str:
     """Генерирует случайное время в диапазоне ±N минут от базового"""
     random_offset = random.randint(-config.random_range_minutes, config.random_range_minutes)
     
-    total_minutes = config.base_hour * 60 + config.base_minute + random_offset
+    total_minutes = _BASE_TOTAL_MINUTES + random_offset
     
     # Корректируем границы суток
-    total_minutes = max(0, min(total_minutes, 23 * 60 + 59))
+    total_minutes = 0 if total_minutes < 0 else min(total_minutes, _MAX_MINUTE)
     
-    target_hour = total_minutes // 60
-    target_minute = total_minutes % 60
+    target_hour, target_minute = divmod(total_minutes, 60)
     
     target_time = f"{target_hour:02d}:{target_minute:02d}"
     
-    logger.info(f"🕒 Случайное время публикации: {target_time} "
-                f"(смещение: {'+' if random_offset >= 0 else ''}{random_offset} минут)")
+    logger.info("🕒 Случайное время публикации: %s (смещение: %+d минут)",
+                target_time, random_offset)
     
     return target_time
 
@@ -128,6 +155,19 @@ def setup_daily_schedule() -> str:
     
     return random_time
 
+def seconds_until_next_event() -> float:
+    """Сколько спать до ближайшего события: публикации по расписанию или полуночи"""
+    now = datetime.datetime.now()
+    midnight = datetime.datetime.combine(now.date() + datetime.timedelta(days=1), datetime.time.min)
+    until_midnight = (midnight - now).total_seconds()
+    
+    idle = schedule.idle_seconds()
+    if idle is None:
+        idle = until_midnight
+    
+    # Не реже раза в час просыпаемся на случай перевода системных часов
+    return max(1.0, min(idle, until_midnight, _MAX_SLEEP_SECONDS))
+
 def main():
     """Основная функция запуска"""
     # Обработчики сигналов
@@ -135,14 +175,14 @@ def main():
     signal.signal(signal.SIGTERM, graceful_shutdown)
     
     logger.info("Бот-издатель цитат запущен...")
-    logger.info(f"📅 Основное время: {config.base_hour:02d}:{config.base_minute:02d}")
-    logger.info(f"🎲 Случайный диапазон: ±{config.random_range_minutes} минут")
+    logger.info("📅 Основное время: %02d:%02d", config.base_hour, config.base_minute)
+    logger.info("🎲 Случайный диапазон: ±%d минут", config.random_range_minutes)
     
     # Проверяем конфигурацию
     try:
         config.validate()
     except ValueError as e:
-        logger.error(f"Ошибка конфигурации: {e}")
+        logger.error("Ошибка конфигурации: %s", e)
         logger.error("Проверьте .env файл и заполните все необходимые поля")
         sys.exit(1)
     
@@ -154,9 +194,9 @@ def main():
     
     # Показываем статистику истории
     stats = history.get_stats()
-    logger.info(f"📊 История публикаций: всего {stats['total']} цитат")
+    logger.info("📊 История публикаций: всего %d цитат", stats['total'])
     if stats['last_30_days'] > 0:
-        logger.info(f"📊 За последние 30 дней: {stats['last_30_days']} публикаций")
+        logger.info("📊 За последние 30 дней: %d публикаций", stats['last_30_days'])
     
     # Тестовая отправка при старте
     logger.info("Отправляю тестовую цитату при старте...")
@@ -164,21 +204,21 @@ def main():
     
     # Настраиваем расписание
     today_time = setup_daily_schedule()
-    logger.info(f"✅ Сегодняшняя публикация запланирована на: {today_time}")
+    logger.info("✅ Сегодняшняя публикация запланирована на: %s", today_time)
     
     # Основной цикл
-    last_check_date = datetime.datetime.now().date()
+    last_check_date = datetime.date.today()
     
     while True:
-        current_date = datetime.datetime.now().date()
+        current_date = datetime.date.today()
         if current_date != last_check_date:
             logger.info("📅 Новый день! Перепланирую публикацию...")
             new_time = setup_daily_schedule()
-            logger.info(f"✅ Публикация запланирована на: {new_time}")
+            logger.info("✅ Публикация запланирована на: %s", new_time)
             last_check_date = current_date
         
         schedule.run_pending()
-        time.sleep(60)
+        time.sleep(seconds_until_next_event())
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -3,35 +3,67 @@ from dataclasses import dataclass
 from dotenv import load_dotenv
 
 # Загружаем .env файл
-env_path = os.path.join(os.path.dirname(__file__), '..', '.env')
-load_dotenv(env_path)
+_project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+env_path = os.path.join(_project_root, '.env')
 
-@dataclass
+# Метка в os.environ: в отличие от кэша в модуле, переживает importlib.reload
+# и наследуется дочерними процессами вместе с уже загруженными значениями
+_DOTENV_LOADED_VAR = '_TG_Q_DOTENV_LOADED'
+
+def _load_env_once() -> bool:
+    """Читает .env не более одного раза за процесс"""
+    if os.environ.get(_DOTENV_LOADED_VAR):
+        return False
+    os.environ[_DOTENV_LOADED_VAR] = '1'
+    if not os.path.exists(env_path):
+        return False
+    return load_dotenv(env_path, override=False)
+
+_load_env_once()
+
+# Снимок окружения: поля читают обычный dict вместо os.environ
+_env = dict(os.environ)
+
+def _env_str(key: str, default: str) -> str:
+    """Строковое значение переменной окружения"""
+    return _env.get(key, default)
+
+def _env_int(key: str, default: int) -> int:
+    """Целое значение переменной окружения (пустое или отсутствующее - default)"""
+    value = _env.get(key)
+    return int(value) if value else default
+
+# Обязательные поля: (атрибут Config, переменная окружения)
+_REQUIRED_FIELDS = (
+    ('tg_q_bot_token', 'TG_Q_BOT_TOKEN'),
+    ('tg_q_channel_id', 'TG_Q_CHANNEL_ID'),
+)
+
+@dataclass(frozen=True, slots=True)
 class Config:
     """Конфигурация приложения"""
     # Telegram
-    tg_q_bot_token: str = os.getenv('TG_Q_BOT_TOKEN', '')
-    tg_q_channel_id: str = os.getenv('TG_Q_CHANNEL_ID', '')
+    tg_q_bot_token: str = _env_str('TG_Q_BOT_TOKEN', '')
+    tg_q_channel_id: str = _env_str('TG_Q_CHANNEL_ID', '')
     
     # Scheduler
-    base_hour: int = int(os.getenv('TG_Q_BASE_HOUR', '9'))
-    base_minute: int = int(os.getenv('TG_Q_BASE_MINUTE', '0'))
-    random_range_minutes: int = int(os.getenv('TG_Q_RANDOM_RANGE_MINUTES', '30'))
+    base_hour: int = _env_int('TG_Q_BASE_HOUR', 9)
+    base_minute: int = _env_int('TG_Q_BASE_MINUTE', 0)
+    random_range_minutes: int = _env_int('TG_Q_RANDOM_RANGE_MINUTES', 30)
     
     # Files
-    quotes_file: str = os.getenv('QUOTES_FILE', 'data/quotes365.json')
-    history_file: str = os.getenv('HISTORY_FILE', 'data/published_history.json')  # Новый файл истории
+    quotes_file: str = _env_str('QUOTES_FILE', 'data/quotes365.json')
+    history_file: str = _env_str('HISTORY_FILE', 'data/published_history.json')  # Новый файл истории
     
     # Logging
-    log_level: str = os.getenv('LOG_LEVEL', 'INFO')
-    log_file: str = os.getenv('LOG_FILE', 'bot.log')
+    log_level: str = _env_str('LOG_LEVEL', 'INFO')
+    log_file: str = _env_str('LOG_FILE', 'bot.log')
     
     def validate(self) -> bool:
         """Проверяет обязательные поля"""
-        if not self.tg_q_bot_token:
-            raise ValueError("TG_Q_BOT_TOKEN не указан в .env файле")
-        if not self.tg_q_channel_id:
-            raise ValueError("TG_Q_CHANNEL_ID не указан в .env файле")
+        for field_name, env_name in _REQUIRED_FIELDS:
+            if not getattr(self, field_name):
+                raise ValueError(f"{env_name} не указан в .env файле")
         return True
 
 # Глобальный объект конфигурации
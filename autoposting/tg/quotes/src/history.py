@@ -1,119 +1,273 @@
-import json
 import os
+import re
+import sys
 import datetime
 import logging  # <-- ДОБАВЛЕНО!
 from typing import Dict, List, Optional, Set
 from config import config
+from utils import json_dumps, json_loads
 
 # Настраиваем логгер для истории
 logger = logging.getLogger(__name__)  # <-- ДОБАВЛЕНО!
 
+# Формат дат в файле истории: YYYY-MM-DD (как и strptime, принимаем и YYYY-M-D)
+_ISO_DATE_RE = re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2})')
+
+# После скольких записей журнал сворачивается в основной файл истории
+_JOURNAL_COMPACT_LINES = 1000
+
+# Директории, уже созданные в этом процессе
+_created_dirs: Set[str] = set()
+
+def _ensure_dir(path: str):
+    """Создает директорию один раз за процесс"""
+    if path and path not in _created_dirs:
+        os.makedirs(path, exist_ok=True)
+        _created_dirs.add(path)
+
 class PublicationHistory:
     """Класс для отслеживания истории публикаций цитат"""
     
     def __init__(self, history_file: str = None):
         self.history_file = history_file or config.history_file
-        self.history = self._load_history()
+        # Если файл истории - симлинк (например, в облачную папку), пишем в его
+        # цель: os.replace по самой ссылке заменил бы ее обычным файлом
+        self._target_file = os.path.realpath(self.history_file)
+        # Журнал дозаписи - отдельный файл рядом с историей; суффикс добавляем,
+        # а не заменяем, чтобы путь не совпал с историей (например, для *.jsonl)
+        self._journal_file = self._target_file + '.journal'
+        self._journal_lines = 0
+        # mtime основного файла на момент последнего чтения/записи
+        self._mtime_ns: Optional[int] = None
+        self._load()
+    
+    def _load(self):
+        """Читает историю с диска в память"""
+        raw_history = self._load_history()
+        has_journal = self._replay_journal(raw_history)
+        # Записи с неразборчивой датой не теряем - сохраняем их как есть
+        self._unparsed: Dict[str, object] = {}
+        # В памяти храним даты, в строки они превращаются только при записи
+        self.history: Dict[str, datetime.date] = self._parse_dates(raw_history, self._unparsed)
+        self._stats_cache = None
+        # Дозаписи с прошлого запуска сворачиваем в основной файл
+        if has_journal:
+            self._save_history()
+    
+    def reload_if_changed(self) -> bool:
+        """Перечитывает историю, только если файл изменили извне"""
+        try:
+            mtime = os.stat(self.history_file).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        except OSError as e:
+            logger.error("Не удалось проверить файл истории: %s", e)
+            return False
+        if mtime == self._mtime_ns:
+            return False
+        
+        logger.info("📂 Файл истории изменен извне - перечитываю")
+        try:
+            self._load()
+        except OSError as e:
+            # Например, файл заблокирован или нет прав: остаемся с историей в памяти
+            # и пробуем снова при следующей публикации
+            logger.error("Не удалось перечитать историю, оставляю текущую: %s", e)
+            self._mtime_ns = None
+            return False
+        return True
     
     def _load_history(self) -> Dict[str, str]:
         """Загружает историю публикаций из файла"""
+        self._mtime_ns = None
         try:
-            if os.path.exists(self.history_file):
-                with open(self.history_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            return {}
-        except (json.JSONDecodeError, FileNotFoundError):
+            # Без отдельной проверки exists(): отсутствие файла ловим на open()
+            with open(self.history_file, 'rb') as f:
+                self._mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+                raw = f.read()
+            # Пустой файл - пустая история, без разбора JSON
+            data = json_loads(raw) if raw else {}
+            return data if isinstance(data, dict) else {}
+        except (ValueError, FileNotFoundError):
             return {}
     
+    def _replay_journal(self, history: Dict[str, str]) -> bool:
+        """Применяет к истории записи из журнала дозаписи. Возвращает True, если журнал есть"""
+        try:
+            with open(self._journal_file, 'rb') as f:
+                for line in f:
+                    try:
+                        entry = json_loads(line)
+                        quote_text = entry['t']
+                        if isinstance(quote_text, str):
+                            history[quote_text] = entry['d']
+                    except (ValueError, KeyError, TypeError):
+                        # Оборванная или битая строка (например, после сбоя)
+                        continue
+            return True
+        except FileNotFoundError:
+            return False
+    
+    def _append_journal(self, quote_text: str, date: datetime.date):
+        """Дописывает одну запись в журнал вместо перезаписи всей истории"""
+        try:
+            _ensure_dir(os.path.dirname(self._journal_file))
+            with open(self._journal_file, 'ab') as f:
+                f.write(json_dumps({'t': quote_text, 'd': date}) + b'\n')
+            self._journal_lines += 1
+        except Exception as e:
+            logger.error("Ошибка записи в журнал истории: %s", e)
+            self._save_history()
+            return
+        
+        if self._journal_lines >= _JOURNAL_COMPACT_LINES:
+            self._save_history()
+    
+    @staticmethod
+    def _parse_dates(history: Dict[str, str],
+                     unparsed: Dict[str, object]) -> Dict[str, datetime.date]:
+        """Разбирает даты истории один раз; некорректные складывает в unparsed"""
+        dates = {}
+        for quote_text, date_str in history.items():
+            match = _ISO_DATE_RE.fullmatch(date_str) if isinstance(date_str, str) else None
+            if match is not None:
+                try:
+                    dates[sys.intern(quote_text)] = datetime.date(*map(int, match.groups()))
+                    continue
+                except ValueError:
+                    # Например, 2024-13-40
+                    pass
+            logger.warning("Некорректная дата в истории для цитаты %.50r: %r", quote_text, date_str)
+            unparsed[quote_text] = date_str
+        return dates
+    
     def _save_history(self):
-        """Сохраняет историю публикаций в файл"""
+        """Сохраняет историю публикаций в файл целиком и очищает журнал"""
         try:
             # Создаем директорию если нужно
-            os.makedirs(os.path.dirname(self.history_file), exist_ok=True)
-            with open(self.history_file, 'w', encoding='utf-8') as f:
-                json.dump(self.history, f, ensure_ascii=False, indent=2)
+            _ensure_dir(os.path.dirname(self._target_file))
+            # Пишем во временный файл рядом и атомарно подменяем основной
+            # Файл истории читают и правят вручную - пишем с отступами
+            payload = {**self._unparsed, **self.history} if self._unparsed else self.history
+            data = memoryview(json_dumps(payload, indent=True))
+            temp_file = self._target_file + '.tmp'
+            fd = os.open(temp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                while data:
+                    data = data[os.write(fd, data):]
+            finally:
+                os.close(fd)
+            os.replace(temp_file, self._target_file)
+            self._mtime_ns = os.stat(self._target_file).st_mtime_ns
+            # Все записи журнала теперь в основном файле
+            try:
+                os.remove(self._journal_file)
+            except FileNotFoundError:
+                pass
+            self._journal_lines = 0
         except Exception as e:
-            print(f"Ошибка сохранения истории: {e}")
+            logger.error("Ошибка сохранения истории: %s", e)
     
-    def is_published_recently(self, quote_text: str, days: int = 365) -> bool:
+    def is_published_recently(self, quote_text: str, days: int = 365,
+                              today: Optional[datetime.date] = None) -> bool:
         """
         Проверяет, публиковалась ли цитата за последние N дней
         
         Args:
             quote_text: текст цитаты
             days: количество дней для проверки (по умолчанию 365)
+            today: текущая дата (чтобы не запрашивать ее повторно в цикле)
         
         Returns:
             True если публиковалась, False если нет
         """
-        if quote_text not in self.history:
+        last_date = self.history.get(quote_text)
+        if last_date is None:
             return False
         
-        last_date_str = self.history[quote_text]
-        try:
-            last_date = datetime.datetime.strptime(last_date_str, '%Y-%m-%d').date()
-            today = datetime.datetime.now().date()
-            days_diff = (today - last_date).days
-            return days_diff < days
-        except ValueError:
-            return False
+        today = today or datetime.date.today()
+        # Разница ординалов - сразу int, без промежуточного timedelta
+        days_diff = today.toordinal() - last_date.toordinal()
+        return days_diff < days
     
     def mark_published(self, quote_text: str):
         """Отмечает цитату как опубликованную сегодня"""
-        today = datetime.datetime.now().date().isoformat()
+        today = datetime.date.today()
+        quote_text = sys.intern(quote_text)
         self.history[quote_text] = today
-        self._save_history()
+        self._stats_cache = None
+        self._append_journal(quote_text, today)
     
-    def get_available_quotes(self, quotes: List[Dict], days: int = 365) -> List[Dict]:
+    def get_available_quotes(self, quotes: List[Dict], days: int = 365,
+                             today: Optional[datetime.date] = None) -> List[Dict]:
         """
         Возвращает список цитат, которые можно опубликовать
         
         Args:
             quotes: список всех цитат
             days: период проверки в днях
+            today: текущая дата (по умолчанию - сегодня)
         
         Returns:
             список доступных цитат
         """
-        available = []
-        for quote in quotes:
-            text = quote.get('text', '')
-            if not self.is_published_recently(text, days):
-                available.append(quote)
-        return available
+        # Порог считаем один раз: цитата доступна, если не публиковалась
+        # или публиковалась не позже cutoff (то же, что days_diff >= days)
+        cutoff = (today or datetime.date.today()) - datetime.timedelta(days=days)
+        published = self.history
+        return [quote for quote in quotes
+                if (date := published.get(quote.get('text', ''))) is None or date <= cutoff]
     
     def get_stats(self) -> Dict:
-        """Возвращает статистику публикаций"""
+        """Возвращает статистику публикаций (кэшируется до следующего изменения)"""
+        today = datetime.date.today()
+        if self._stats_cache is not None and self._stats_cache[0] == today:
+            return dict(self._stats_cache[1])
+        
         total = len(self.history)
         if total == 0:
-            return {"total": 0, "last_30_days": 0, "oldest": None, "newest": None}
+            stats = {"total": 0, "last_30_days": 0, "oldest": None, "newest": None}
+            self._stats_cache = (today, stats)
+            return dict(stats)
         
-        # Считаем публикации за последние 30 дней
-        today = datetime.datetime.now().date()
+        # Один проход: публикации за последние 30 дней, самая старая и новая даты
+        cutoff = today - datetime.timedelta(days=30)
         last_30_days = 0
-        dates = []
+        oldest = newest = None
         
-        for date_str in self.history.values():
-            try:
-                date = datetime.datetime.strptime(date_str, '%Y-%m-%d').date()
-                dates.append(date)
-                if (today - date).days <= 30:
-                    last_30_days += 1
-            except ValueError:
-                continue
+        for date in self.history.values():
+            if date >= cutoff:
+                last_30_days += 1
+            if oldest is None or date < oldest:
+                oldest = date
+            if newest is None or date > newest:
+                newest = date
         
-        return {
+        stats = {
             "total": total,
             "last_30_days": last_30_days,
-            "oldest": min(dates).isoformat() if dates else None,
-            "newest": max(dates).isoformat() if dates else None
+            "oldest": oldest.isoformat() if oldest else None,
+            "newest": newest.isoformat() if newest else None
         }
+        self._stats_cache = (today, stats)
+        return dict(stats)
     
     def reset_history(self):
         """Полностью сбрасывает историю для нового цикла"""
         self.history.clear()
+        self._unparsed.clear()
+        self._stats_cache = None
         self._save_history()
         logger.info("📆 История публикаций сброшена - начинаем новый годовой цикл!")
 
-# Глобальный объект истории
-history = PublicationHistory()
\ No newline at end of file
+# Глобальный объект истории создается при первом обращении (PEP 562),
+# чтобы импорт модуля не читал файл истории
+_history: Optional[PublicationHistory] = None
+
+def __getattr__(name: str):
+    global _history
+    if name == 'history':
+        if _history is None:
+            _history = PublicationHistory()
+        return _history
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
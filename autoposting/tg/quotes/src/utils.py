@@ -1,20 +1,44 @@
+import json
+import datetime
 import logging
 import sys
-import signal
 import os
 
+try:
+    import orjson
+
+    json_loads = orjson.loads
+
+    def json_dumps(data, indent: bool = False) -> bytes:
+        """Сериализует данные в UTF-8 JSON (indent=True - с отступами в 2 пробела)"""
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else None)
+except ImportError:  # orjson не обязателен
+    json_loads = json.loads
+
+    def json_dumps(data, indent: bool = False) -> bytes:
+        """Сериализует данные в UTF-8 JSON (indent=True - с отступами в 2 пробела)"""
+        # Даты пишем в ISO-формате, как это делает orjson
+        return json.dumps(data, ensure_ascii=False, indent=2 if indent else None,
+                          default=datetime.date.isoformat).encode('utf-8')
+
+# Общий форматтер для всех handler'ов
+_formatter = logging.Formatter(
+    '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
 def setup_logger(name: str, level: str = "INFO", log_file: str = None) -> logging.Logger:
     """Настройка логирования"""
     logger = logging.getLogger(name)
-    logger.setLevel(getattr(logging, level.upper()))
     
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
+    # Логгер уже настроен - не добавляем handler'ы повторно
+    if logger.handlers:
+        return logger
+    
+    logger.setLevel(getattr(logging, level.upper()))
     
     # Консольный handler
     console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setFormatter(formatter)
+    console_handler.setFormatter(_formatter)
     logger.addHandler(console_handler)
     
     # Файловый handler
@@ -22,22 +46,22 @@ def setup_logger(name: str, level: str = "INFO", log_file: str = None) -> loggin
         try:
             # Создаем директорию если нужно
             log_dir = os.path.dirname(log_file)
-            if log_dir and not os.path.exists(log_dir):
+            if log_dir:
                 os.makedirs(log_dir, mode=0o755, exist_ok=True)
             
             file_handler = logging.FileHandler(log_file, encoding='utf-8')
-            file_handler.setFormatter(formatter)
+            file_handler.setFormatter(_formatter)
             logger.addHandler(file_handler)
-            logger.info(f"📝 Логирование в файл: {log_file}")
+            logger.info("📝 Логирование в файл: %s", log_file)
         except PermissionError:
-            logger.warning(f"⚠️ Нет прав на запись в {log_file}, логируем только в консоль")
+            logger.warning("⚠️ Нет прав на запись в %s, логируем только в консоль", log_file)
         except Exception as e:
-            logger.warning(f"⚠️ Не удалось создать файл лога: {e}")
+            logger.warning("⚠️ Не удалось создать файл лога: %s", e)
     
     return logger
 
 def graceful_shutdown(signum, frame):
     """Обработчик graceful shutdown"""
     logger = logging.getLogger(__name__)
-    logger.info(f"\nПолучен сигнал {signum}. Останавливаю бота...")
+    logger.info("\nПолучен сигнал %s. Останавливаю бота...", signum)
     sys.exit(0)
\ No newline at end of file